@@ -156,6 +156,17 @@ def dRq_de(theta, e, q):
     return (-1.0 / theta) * R * qx * (vvt + (Rt - I3) * vx)
 
 
+def concatenate_flex_double(arrays):
+    """Concatenate flex.double arrays into a new array, reserving the full
+    length up front so that the result is allocated only once"""
+
+    result = flex.double()
+    result.reserve(sum(len(a) for a in arrays))
+    for a in arrays:
+        result.extend(a)
+    return result
+
+
 def random_param_shift(vals, sigmas):
     """Add a random (normal) shift to a parameter set, for testing"""
 
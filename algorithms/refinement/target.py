@@ -10,6 +10,8 @@
 from scitbx.array_family import flex
 from scitbx import sparse
 
+from dials.algorithms.refinement.refinement_helpers import concatenate_flex_double
+
 # PHIL
 from libtbx.phil import parse
 
@@ -155,6 +157,7 @@ def __init__(
         # Quantities to cache each step
         self._rmsds = None
         self._matches = None
+        self._match_selections = {}
 
         # Keep maximum number of reflections used for Jacobian calculation, if
         # a cutoff is required
@@ -179,16 +182,16 @@ def _predict_core(self, reflections, skip_derivatives=False):
         # have ub_matrix set)
         self._reflection_predictor(reflections)
 
-        x_obs, y_obs, phi_obs = reflections["xyzobs.mm.value"].parts()
-        x_calc, y_calc, phi_calc = reflections["xyzcal.mm"].parts()
-
-        # calculate residuals and assign columns
-        reflections["x_resid"] = x_calc - x_obs
-        reflections["x_resid2"] = reflections["x_resid"] ** 2
-        reflections["y_resid"] = y_calc - y_obs
-        reflections["y_resid2"] = reflections["y_resid"] ** 2
-        reflections["phi_resid"] = phi_calc - phi_obs
-        reflections["phi_resid2"] = reflections["phi_resid"] ** 2
+        # calculate residuals with a single vec3 subtraction and assign columns
+        x_resid, y_resid, phi_resid = (
+            reflections["xyzcal.mm"] - reflections["xyzobs.mm.value"]
+        ).parts()
+        reflections["x_resid"] = x_resid
+        reflections["x_resid2"] = x_resid * x_resid
+        reflections["y_resid"] = y_resid
+        reflections["y_resid2"] = y_resid * y_resid
+        reflections["phi_resid"] = phi_resid
+        reflections["phi_resid2"] = phi_resid * phi_resid
 
         return reflections
 
@@ -283,21 +286,29 @@ def get_num_matches_for_experiment(self, iexp=0):
         """return the number of reflections currently used in the calculation"""
 
         self.update_matches()
-        sel = self._matches["id"] == iexp
-        return sel.count(True)
+        return len(self._select_matches("id", iexp))
 
     def get_num_matches_for_panel(self, ipanel=0):
         """return the number of reflections currently used in the calculation"""
 
         self.update_matches()
-        sel = self._matches["panel"] == ipanel
-        return sel.count(True)
+        return len(self._select_matches("panel", ipanel))
+
+    def _select_matches(self, column, value):
+        """return the indices of the matches with the given value in the given
+        column, caching the result until the matches are next updated"""
+
+        key = (column, value)
+        if key not in self._match_selections:
+            self._match_selections[key] = (self._matches[column] == value).iselection()
+        return self._match_selections[key]
 
     def update_matches(self, force=False):
         """ensure the observations matched to predictions are up to date"""
 
         if not self._matches or force:
             self._matches = self._reflection_manager.get_matches()
+            self._match_selections = {}
 
     def compute_functional_gradients_and_curvatures(self, block=None):
         """calculate the value of the target function and its gradients. Set
@@ -325,6 +336,11 @@ def compute_functional_gradients_and_curvatures(self, block=None):
         # calculate target function
         L = 0.5 * flex.sum(weights * residuals2)
 
+        # split the weighted residuals and weights by dimension once, so that the
+        # gradients for each parameter need not be concatenated
+        w_resid_each_dim = [w_resid[i * nref : (i + 1) * nref] for i in range(self.dim)]
+        weights_each_dim = [weights[i * nref : (i + 1) * nref] for i in range(self.dim)]
+
         def process_one_gradient(result):
             # copy gradients out of the result in the right order
             grads = [result[key] for key in self._grad_names]
@@ -334,9 +350,11 @@ def process_one_gradient(result):
                 result[k] = None
 
             # add new keys
-            grads = self._concatenate_gradients(grads)
-            result["dL_dp"] = flex.sum(w_resid * grads)
-            result["curvature"] = flex.sum(weights * grads * grads)
+            dL_dp, curvature = self._gradient_reductions(
+                grads, w_resid_each_dim, weights_each_dim
+            )
+            result["dL_dp"] = dL_dp
+            result["curvature"] = curvature
             return result
 
         results = self.calculate_gradients(matches, callback=process_one_gradient)
@@ -404,6 +422,11 @@ def split_matches_into_blocks(self, nproc=1):
         # ensure at least 100 reflections per block
         nblocks = min(nblocks, int(len(self._matches) / 100))
         nblocks = max(nblocks, 1)
+
+        # avoid copying the whole table into a single block
+        if nblocks == 1:
+            return [self._matches]
+
         blocksize = int(math.floor(len(self._matches) / nblocks))
         blocks = []
         for block_num in range(nblocks - 1):
@@ -468,24 +491,32 @@ def _build_jacobian(grads_each_dim, nelem=None, nparam=None):
         may be overridden for the case where these vectors use sparse storage"""
 
         jacobian = flex.double(flex.grid(nelem, nparam))
-        # loop over parameters
-        for i in range(nparam):
-            col = grads_each_dim[0][i]
-            for g in grads_each_dim[1:]:
-                col.extend(g[i])
-            jacobian.matrix_paste_column_in_place(col, i)
+        nref = int(nelem / len(grads_each_dim))
+
+        # loop over dimensions, stacking the gradients for every parameter as the
+        # rows of one block, which is transposed into place in the Jacobian
+        for idim, grads in enumerate(grads_each_dim):
+            block = concatenate_flex_double(grads)
+            block.reshape(flex.grid(nparam, nref))
+            jacobian.matrix_paste_block_in_place(
+                block.matrix_transpose(), idim * nref, 0
+            )
 
         return jacobian
 
     @staticmethod
-    def _concatenate_gradients(grads):
-        """concatenate gradient vectors and return a flex.double. This method
-        may be overriden for the case where these vectors use sparse storage"""
-
-        result = grads[0]
-        for g in grads[1:]:
-            result.extend(g)
-        return result
+    def _gradient_reductions(grads, w_resid_each_dim, weights_each_dim):
+        """return the gradient of the target function and the least squares
+        approximation to its curvature for a single parameter, accumulated over
+        each dimension of the problem. This method may be overriden for the case
+        where the gradient vectors use sparse storage"""
+
+        dL_dp = 0.0
+        curvature = 0.0
+        for g, w_resid, weights in zip(grads, w_resid_each_dim, weights_each_dim):
+            dL_dp += flex.sum(w_resid * g)
+            curvature += flex.sum(weights * g * g)
+        return dL_dp, curvature
 
     @staticmethod
     @abc.abstractmethod
@@ -526,24 +557,22 @@ def rmsds_for_experiment(self, iexp=0):
         """calculate unweighted RMSDs for the selected experiment."""
 
         self.update_matches()
-        sel = self._matches["id"] == iexp
-        n = sel.count(True)
-        if n == 0:
+        isel = self._select_matches("id", iexp)
+        if len(isel) == 0:
             return None
 
-        rmsds = self._rmsds_core(self._matches.select(sel))
+        rmsds = self._rmsds_core(self._matches.select(isel))
         return rmsds
 
     def rmsds_for_panel(self, ipanel=0):
         """calculate unweighted RMSDs for the selected panel."""
 
         self.update_matches()
-        sel = self._matches["panel"] == ipanel
-        n = sel.count(True)
-        if n == 0:
+        isel = self._select_matches("panel", ipanel)
+        if len(isel) == 0:
             return None
 
-        rmsds = self._rmsds_core(self._matches.select(sel))
+        rmsds = self._rmsds_core(self._matches.select(isel))
         return rmsds
 
     @abc.abstractmethod
@@ -605,22 +634,19 @@ def __init__(
     def _extract_residuals_and_weights(matches):
 
         # return residuals and weights as 1d flex.double vectors
-        residuals = flex.double.concatenate(matches["x_resid"], matches["y_resid"])
-        residuals.extend(matches["phi_resid"])
-
-        weights, w_y, w_z = matches["xyzobs.mm.weights"].parts()
-        weights.extend(w_y)
-        weights.extend(w_z)
+        residuals = concatenate_flex_double(
+            [matches["x_resid"], matches["y_resid"], matches["phi_resid"]]
+        )
+        weights = concatenate_flex_double(matches["xyzobs.mm.weights"].parts())
 
         return residuals, weights
 
     @staticmethod
     def _extract_squared_residuals(matches):
 
-        residuals2 = flex.double.concatenate(matches["x_resid2"], matches["y_resid2"])
-        residuals2.extend(matches["phi_resid2"])
-
-        return residuals2
+        return concatenate_flex_double(
+            [matches["x_resid2"], matches["y_resid2"], matches["phi_resid2"]]
+        )
 
     def _rmsds_core(self, reflections):
         """calculate unweighted RMSDs for the specified reflections"""
@@ -655,8 +681,8 @@ def achieved(self):
 
 class SparseGradientsMixin:
     """Mixin class to build a sparse Jacobian from gradients of the prediction
-    formula stored as sparse vectors, and allow concatenation of gradient vectors
-    that employed sparse storage."""
+    formula stored as sparse vectors, and reduce gradient vectors that employed
+    sparse storage."""
 
     @staticmethod
     def _build_jacobian(grads_each_dim, nelem=None, nparam=None):
@@ -664,28 +690,31 @@ def _build_jacobian(grads_each_dim, nelem=None, nparam=None):
 
         nref = int(nelem / len(grads_each_dim))
 
-        blocks = [sparse.matrix(nref, nparam) for _ in grads_each_dim]
         jacobian = sparse.matrix(nelem, nparam)
 
-        # loop over parameters, building full width blocks of the full Jacobian
-        for i in range(nparam):
-            for block, grad in zip(blocks, grads_each_dim):
-                block[:, i] = grad[i]
-
-        # set the blocks in the Jacobian
-        for i, block in enumerate(blocks):
-            jacobian.assign_block(block, (i * nref), 0)
+        # loop over dimensions, building one full width block of the Jacobian at
+        # a time and setting it in place, so that only a single intermediate block
+        # is held in memory
+        for idim, grads in enumerate(grads_each_dim):
+            block = sparse.matrix(nref, nparam)
+            for i, grad in enumerate(grads):
+                block[:, i] = grad
+            jacobian.assign_block(block, (idim * nref), 0)
 
         return jacobian
 
     @staticmethod
-    def _concatenate_gradients(grads):
-        """concatenate sparse gradient vectors and return a flex.double."""
-
-        result = grads[0].as_dense_vector()
-        for g in grads[1:]:
-            result.extend(g.as_dense_vector())
-        return result
+    def _gradient_reductions(grads, w_resid_each_dim, weights_each_dim):
+        """return the gradient of the target function and the least squares
+        approximation to its curvature for a single parameter, using sparse
+        dot products so that the gradient vectors are never made dense."""
+
+        dL_dp = 0.0
+        curvature = 0.0
+        for g, w_resid, weights in zip(grads, w_resid_each_dim, weights_each_dim):
+            dL_dp += g * w_resid
+            curvature += sparse.weighted_dot(g, weights, g)
+        return dL_dp, curvature
 
 
 class LeastSquaresPositionalResidualWithRmsdCutoffSparse(
@@ -3,6 +3,7 @@
 from cctbx.array_family import flex
 
 # dials imports
+from dials.algorithms.refinement.refinement_helpers import concatenate_flex_double
 from dials.algorithms.refinement.target import Target, SparseGradientsMixin
 
 # constants
@@ -64,15 +65,16 @@ def _predict_core(self, reflections):
         # do prediction (updates reflection table in situ).
         self._reflection_predictor(reflections)
 
-        x_obs, y_obs, _ = reflections["xyzobs.mm.value"].parts()
-        x_calc, y_calc, _ = reflections["xyzcal.mm"].parts()
-
-        # calculate residuals and assign columns
-        reflections["x_resid"] = x_calc - x_obs
-        reflections["x_resid2"] = reflections["x_resid"] ** 2
-        reflections["y_resid"] = y_calc - y_obs
-        reflections["y_resid2"] = reflections["y_resid"] ** 2
-        reflections["delpsical2"] = reflections["delpsical.rad"] ** 2
+        # calculate residuals with a single vec3 subtraction and assign columns
+        x_resid, y_resid, _ = (
+            reflections["xyzcal.mm"] - reflections["xyzobs.mm.value"]
+        ).parts()
+        reflections["x_resid"] = x_resid
+        reflections["x_resid2"] = x_resid * x_resid
+        reflections["y_resid"] = y_resid
+        reflections["y_resid2"] = y_resid * y_resid
+        delpsical = reflections["delpsical.rad"]
+        reflections["delpsical2"] = delpsical * delpsical
 
         return reflections
 
@@ -87,23 +89,21 @@ def predict_for_reflection_table(self, reflections, skip_derivatives=False):
     def _extract_residuals_and_weights(matches):
 
         # return residuals and weights as 1d flex.double vectors
-        residuals = flex.double.concatenate(matches["x_resid"], matches["y_resid"])
-        residuals.extend(matches["delpsical.rad"])
+        residuals = concatenate_flex_double(
+            [matches["x_resid"], matches["y_resid"], matches["delpsical.rad"]]
+        )
 
-        weights, w_y, _ = matches["xyzobs.mm.weights"].parts()
-        w_delpsi = matches["delpsical.weights"]
-        weights.extend(w_y)
-        weights.extend(w_delpsi)
+        w_x, w_y, _ = matches["xyzobs.mm.weights"].parts()
+        weights = concatenate_flex_double([w_x, w_y, matches["delpsical.weights"]])
 
         return residuals, weights
 
     @staticmethod
     def _extract_squared_residuals(matches):
 
-        residuals2 = flex.double.concatenate(matches["x_resid2"], matches["y_resid2"])
-        residuals2.extend(matches["delpsical2"])
-
-        return residuals2
+        return concatenate_flex_double(
+            [matches["x_resid2"], matches["y_resid2"], matches["delpsical2"]]
+        )
 
     def _rmsds_core(self, reflections):
         """calculate unweighted RMSDs"""
@@ -26,11 +26,13 @@ def cctbx_i_over_sigi_ms_from_dials_data(reflections, cctbx_crystal_symmetry):
 
 
 def offset_miller_indices(indices, offset):
+    return _miller_indices_from_vec3(indices.as_vec3_double() + offset)
+
+
+def _miller_indices_from_vec3(vec3):
     from dials.array_family import flex
 
-    return flex.miller_index(
-        *[mi.iround() for mi in (indices.as_vec3_double() + offset).parts()]
-    )
+    return flex.miller_index(*[mi.iround() for mi in vec3.parts()])
 
 
 def compute_miller_set_correlation(
@@ -67,6 +69,29 @@ def compute_miller_set_correlation(
     return common_a.size(), common_a.correlation(common_b).coefficient()
 
 
+def _compute_indexed_data_correlation(indices_a, data_a, indices_b, data_b):
+    """Compute correlation between two data arrays over their common indices.
+
+    This is equivalent to compute_miller_set_correlation without mapping to the
+    asymmetric unit or merging, but works directly on the indices and data to
+    avoid constructing intermediate miller arrays.
+
+    Returns:
+      tuple[int, float]: A tuple of the number of observations and the correlation
+      coefficient.
+    """
+    from cctbx import miller
+    from dials.array_family import flex
+
+    # match in the same order as ms_a.common_sets(ms_b), which matters for
+    # repeated (unmerged) indices
+    pairs = miller.match_indices(indices_b, indices_a).pairs()
+    corr = flex.linear_correlation(
+        data_a.select(pairs.column(1)), data_b.select(pairs.column(0))
+    )
+    return len(pairs), corr.coefficient()
+
+
 def get_hkl_offset_correlation_coefficients(
     dials_reflections,
     dials_crystal,
@@ -82,7 +107,6 @@ def get_hkl_offset_correlation_coefficients(
 
     from dials.array_family import flex
     from cctbx.miller import set as miller_set
-    from cctbx import sgtbx
 
     cs = cctbx_crystal_from_dials(dials_crystal)
     ms = cctbx_i_over_sigi_ms_from_dials_data(dials_reflections, cs)
@@ -96,11 +120,6 @@ def get_hkl_offset_correlation_coefficients(
     offsets = flex.vec3_int()
     nref = flex.size_t()
 
-    if reference:
-        cb_op = sgtbx.change_of_basis_op("x,y,z")
-    else:
-        cb_op = sgtbx.change_of_basis_op("-x,-y,-z")
-
     hkl_test = [
         (h, k, l)
         for h in range(-grid_h, grid_h + 1)
@@ -108,15 +127,45 @@ def get_hkl_offset_correlation_coefficients(
         for l in range(-grid_l, grid_l + 1)
     ]
 
+    # Loop invariants: the change of basis op is either the identity (when
+    # comparing against a reference) or -x,-y,-z, which is just a sign flip of
+    # the offset indices, so apply it directly rather than via sgtbx
+    indices_as_double = ms.indices().as_vec3_double()
+    data = ms.data()
+
+    if map_to_asu and reference_ms:
+        # the reference does not depend on the offset, so map it to the ASU once
+        reference_asu = (
+            miller_set(cs, reference_ms.indices())
+            .array(reference_ms.data())
+            .map_to_asu()
+        )
+
     for hkl in hkl_test:
-        indices = offset_miller_indices(ms.indices(), hkl)
-        reindexed_indices = cb_op.apply(indices)
-        rms = miller_set(cs, reindexed_indices).array(ms.data())
+        if hkl == (0, 0, 0):
+            # no offset, so reuse the original indices rather than rounding
+            offset_indices = indices_as_double
+            indices = ms.indices()
+        else:
+            offset_indices = indices_as_double + hkl
+            indices = _miller_indices_from_vec3(offset_indices)
         if reference_ms:
-            _ms = reference_ms
+            _indices, _data = reference_ms.indices(), reference_ms.data()
+            reindexed_indices = indices
+        else:
+            _indices, _data = indices, data
+            reindexed_indices = _miller_indices_from_vec3(offset_indices * -1.0)
+        if map_to_asu:
+            if reference_ms:
+                ms_a = reference_asu
+            else:
+                ms_a = miller_set(cs, _indices).array(_data).map_to_asu()
+            ms_b = miller_set(cs, reindexed_indices).array(data).map_to_asu()
+            n, cc = compute_miller_set_correlation(ms_a, ms_b)
         else:
-            _ms = miller_set(cs, indices).array(ms.data())
-        n, cc = compute_miller_set_correlation(_ms, rms, map_to_asu=map_to_asu)
+            n, cc = _compute_indexed_data_correlation(
+                _indices, _data, reindexed_indices, data
+            )
         ccs.append(cc)
         offsets.append(hkl)
         nref.append(n)
@@ -27,6 +27,7 @@
 from scitbx import matrix
 
 __all__ = [
+    "map_lab_coords_to_reciprocal_space",
     "real",
     "reflection_table_selector",
 ]
@@ -42,6 +43,36 @@
     raise TypeError('unknown "real" type')
 
 
+def map_lab_coords_to_reciprocal_space(
+    lab_coords, rot_angle, beam, goniometer=None, sample_rotation=None
+):
+    """Map the lab frame coordinates of spot centroids to reciprocal space.
+
+    Args:
+      lab_coords (flex.vec3_double): The lab frame coordinates of the centroids
+        on the detector.
+      rot_angle (flex.double): The rotation angles of the centroids in radians.
+      beam (dxtbx.model.Beam): The beam model.
+      goniometer (dxtbx.model.Goniometer): The goniometer model, if any.
+      sample_rotation (scitbx.matrix.sqr): The fixed rotation to remove from the
+        reciprocal lattice points. Only used if there is a goniometer.
+
+    Returns:
+      tuple: The s1 vectors and the reciprocal lattice points, both as
+      :py:class:`.flex.vec3_double` arrays.
+    """
+
+    s1 = lab_coords / lab_coords.norms() * (1 / beam.get_wavelength())
+    rlp = s1 - beam.get_s0()
+    if goniometer is not None:
+        setting_rotation = matrix.sqr(goniometer.get_setting_rotation())
+        rlp = tuple(setting_rotation.inverse()) * rlp
+        rlp = rlp.rotate_around_origin(goniometer.get_rotation_axis_datum(), -rot_angle)
+        if sample_rotation is not None:
+            rlp = tuple(sample_rotation.inverse()) * rlp
+    return s1, rlp
+
+
 @boost.python.inject_into(dials_array_family_flex_ext.reflection_table)
 class _(object):
     """
@@ -1182,33 +1213,19 @@ def map_centroids_to_reciprocal_space(
                     x, y, rot_angle = self["xyzcal.mm"].select(sel).parts()
                 else:
                     x, y, rot_angle = self["xyzobs.mm.value"].select(sel).parts()
-                s1 = expt.detector[i_panel].get_lab_coord(
+                lab_coords = expt.detector[i_panel].get_lab_coord(
                     cctbx.array_family.flex.vec2_double(x, y)
                 )
-                s1 = s1 / s1.norms() * (1 / expt.beam.get_wavelength())
-                self["s1"].set_selected(sel, s1)
-                S = s1 - expt.beam.get_s0()
+                sample_rotation = None
                 if expt.goniometer is not None:
-                    setting_rotation = matrix.sqr(
-                        expt.goniometer.get_setting_rotation()
-                    )
-                    rotation_axis = expt.goniometer.get_rotation_axis_datum()
                     sample_rotation = matrix.sqr(expt.goniometer.get_fixed_rotation())
                     if expt.crystal and crystal_frame:
                         sample_rotation *= matrix.sqr(expt.crystal.get_U())
-
-                    self["rlp"].set_selected(sel, tuple(setting_rotation.inverse()) * S)
-                    self["rlp"].set_selected(
-                        sel,
-                        self["rlp"]
-                        .select(sel)
-                        .rotate_around_origin(rotation_axis, -rot_angle),
-                    )
-                    self["rlp"].set_selected(
-                        sel, tuple(sample_rotation.inverse()) * self["rlp"].select(sel),
-                    )
-                else:
-                    self["rlp"].set_selected(sel, S)
+                s1, rlp = map_lab_coords_to_reciprocal_space(
+                    lab_coords, rot_angle, expt.beam, expt.goniometer, sample_rotation
+                )
+                self["s1"].set_selected(sel, s1)
+                self["rlp"].set_selected(sel, rlp)
 
     def calculate_entering_flags(self, experiments):
         """Calculate the entering flags for the reflections.
@@ -5,7 +5,7 @@
 import sys
 
 import iotbx.phil
-from cctbx import sgtbx
+from cctbx import miller, sgtbx
 from cctbx.crystal import symmetry as crystal_symmetry
 from cctbx.miller import set as miller_set
 from cctbx.sgtbx import space_group as sgtbx_space_group
@@ -115,14 +115,21 @@ def format_cc_with_standard_error(cc, se, decimal_places=3):
     return cc_str
 
 
-def get_symop_correlation_coefficients(miller_array, use_binning=False):
+def get_symop_correlation_coefficients(miller_array, use_binning=False, symops=None):
     corr_coeffs = flex.double()
     n_refs = flex.int()
-    space_group = miller_array.space_group()
-    for smx in space_group.smx():
-        reindexed_array = miller_array.change_basis(sgtbx.change_of_basis_op(smx))
-        intensity, intensity_rdx = reindexed_array.common_sets(miller_array)
+    if symops is None:
+        symops = miller_array.space_group().smx()
+    indices = miller_array.indices()
+    data = miller_array.data()
+    for smx in symops:
+        reindexed_indices = sgtbx.change_of_basis_op(smx).apply(indices)
         if use_binning:
+            # A symmetry operator of the space group leaves the crystal symmetry
+            # unchanged, so only the indices need to be reindexed. This avoids
+            # rebuilding the crystal symmetry for each operator in change_basis.
+            reindexed_array = miller_array.customized_copy(indices=reindexed_indices)
+            intensity, intensity_rdx = reindexed_array.common_sets(miller_array)
             intensity.use_binning_of(miller_array)
             intensity_rdx.use_binning_of(miller_array)
             cc = intensity.correlation(intensity_rdx, use_binning=use_binning)
@@ -134,13 +141,18 @@ def get_symop_correlation_coefficients(miller_array, use_binning=False):
                     ),
                 )
             )
+            n_refs.append(intensity.size())
         else:
-            corr_coeffs.append(
-                intensity.correlation(
-                    intensity_rdx, use_binning=use_binning
-                ).coefficient()
+            # Without binning, match the indices and correlate the data directly,
+            # rather than constructing a pair of common miller arrays per operator.
+            # The argument order matches reindexed_array.common_sets(miller_array),
+            # which matters when the (unmerged) indices are not unique.
+            pairs = miller.match_indices(indices, reindexed_indices).pairs()
+            corr = flex.linear_correlation(
+                data.select(pairs.column(1)), data.select(pairs.column(0))
             )
-        n_refs.append(intensity.size())
+            corr_coeffs.append(corr.coefficient())
+            n_refs.append(len(pairs))
     return corr_coeffs, n_refs
 
 
@@ -157,20 +169,19 @@ def test_crystal_pointgroup_symmetry(reflections, experiment, params):
     crystal = experiment.crystal
 
     # in case we pass in reflections from integration
-    reflections = reflections.select(reflections["intensity.sum.variance"] > 0)
-    reflections = reflections.select(reflections["intensity.sum.value"] > 0)
-    original_miller_indices = reflections["miller_index"]
+    intensities = reflections["intensity.sum.value"]
+    variances = reflections["intensity.sum.variance"]
+    sel = (variances > 0) & (intensities > 0)
+    original_miller_indices = reflections["miller_index"].select(sel)
+    data = intensities.select(sel) / flex.sqrt(variances.select(sel))
 
     space_group = crystal.get_space_group()
     unit_cell = crystal.get_unit_cell()
 
+    symops = list(space_group.smx())
     cs = crystal_symmetry(unit_cell, space_group.type().lookup_symbol())
 
-    ms = miller_set(cs, original_miller_indices)
-    ms = ms.array(
-        reflections["intensity.sum.value"]
-        / flex.sqrt(reflections["intensity.sum.variance"])
-    )
+    ms = miller_set(cs, original_miller_indices).array(data)
 
     if params.d_min or params.d_max:
         d_spacings = ms.d_spacings().data()
@@ -189,10 +200,10 @@ def test_crystal_pointgroup_symmetry(reflections, experiment, params):
 
     true_symops = []
 
-    ccs, n_refs = get_symop_correlation_coefficients(ms)
+    ccs, n_refs = get_symop_correlation_coefficients(ms, symops=symops)
     ses = standard_error_of_pearson_cc(ccs, n_refs)
 
-    for smx, cc, n_ref, se in zip(space_group.smx(), ccs, n_refs, ses):
+    for smx, cc, n_ref, se in zip(symops, ccs, n_refs, ses):
         accept = ""
         if params.symop_threshold:
             if (cc - 2.0 * se) > params.symop_threshold:
@@ -246,7 +246,7 @@ def sample_predictions(experiments, predicted, params):
 
     RAD2DEG = 180.0 / pi
 
-    working_isel = flex.size_t()
+    isels = []
     for iexp, exp in enumerate(experiments):
 
         sel = predicted["id"] == iexp
@@ -271,6 +271,12 @@ def sample_predictions(experiments, predicted, params):
         # determine subset and collect indices
         if sample_size < nrefs:
             isel = isel.select(flex.random_selection(nrefs, sample_size))
+        isels.append(isel)
+
+    # collect the indices into a single preallocated selection
+    working_isel = flex.size_t()
+    working_isel.reserve(sum(len(isel) for isel in isels))
+    for isel in isels:
         working_isel.extend(isel)
 
     # create subset
@@ -47,10 +47,10 @@ def __init__(self):
             epilog=help_message, usage=usage, phil=phil_scope, read_reflections=True
         )
 
-    def run(self):
+    def run(self, args=None):
         """Run the script."""
         # Parse the command line arguments
-        params, options = self.parser.parse_args(show_diff_phil=True)
+        params, options = self.parser.parse_args(args=args, show_diff_phil=True)
         if len(params.input.reflections) == 0:
             self.parser.print_help()
             return
@@ -9,8 +9,9 @@
 import random
 import sys
 
+import numpy as np
+
 import libtbx.introspection
-from libtbx.test_utils import approx_equal
 from libtbx.utils import plural_s
 from scitbx import matrix
 from scitbx.simplex import simplex_opt
@@ -22,6 +23,7 @@
 from rstbx.dps_core import Direction, Directional_FFT
 
 from dials.algorithms.indexing.indexer import find_max_cell
+from dials.array_family.flex_ext import map_lab_coords_to_reciprocal_space
 from dials.util import log
 from dials.util import Sorry
 from dials.util.options import OptionParser, reflections_and_experiments_from_files
@@ -29,6 +31,8 @@
 
 logger = logging.getLogger("dials.command_line.search_beam_position")
 
+TWO_PI = 2.0 * math.pi
+
 help_message = """
 
 Search for a better beam centre using the results of spot finding. Based on
@@ -105,51 +109,58 @@ def optimize_origin_offset_local_scope(
     beamr1 = beamr0.cross(s0).normalize()
     beamr2 = beamr1.cross(s0).normalize()
 
-    assert approx_equal(s0.dot(beamr1), 0.0)
-    assert approx_equal(s0.dot(beamr2), 0.0)
-    assert approx_equal(beamr2.dot(beamr1), 0.0)
     # so the orthonormal vectors are s0, beamr1 and beamr2
 
-    if mm_search_scope:
-        plot_px_sz = experiments[0].detector[0].get_pixel_size()[0]
-        plot_px_sz *= wide_search_binning
-        grid = max(1, int(mm_search_scope / plot_px_sz))
-        widegrid = 2 * grid + 1
+    # the simplex works in units of 0.2 mm along beamr1 and beamr2, so map its
+    # coordinates to an origin offset with a single 3x2 matrix product
+    simplex_basis = matrix.rec(
+        [0.2 * e for pair in zip(beamr1.elems, beamr2.elems) for e in pair], (3, 2)
+    )
+
+    # the DPS solution directions are invariant over the search, so construct
+    # them once rather than for every trial origin offset
+    direction_lists = [_solution_directions(solutions) for solutions in solution_lists]
+
+    # a trial origin offset just translates the lab frame coordinates of the spots
+    # on the current detector, so calculate these once too
+    lab_coord_lists = [
+        _spot_lab_coordinates(refl, expt.detector)
+        for refl, expt in zip(reflection_lists, experiments)
+    ]
+    phi_lists = [refl["xyzobs.mm.value"].parts()[2] for refl in reflection_lists]
 
-        def get_experiment_score_for_coord(x, y):
-            new_origin_offset = x * plot_px_sz * beamr1 + y * plot_px_sz * beamr2
-            return sum(
+    def get_scores_for_offsets(offsets):
+        return flex.double(
+            sum(
                 _get_origin_offset_score(
-                    new_origin_offset,
-                    solution_lists[i],
+                    matrix.col(offset),
+                    direction_lists[i],
                     amax_lists[i],
-                    reflection_lists[i],
+                    lab_coord_lists[i],
+                    phi_lists[i],
                     experiment,
                 )
                 for i, experiment in enumerate(experiments)
             )
-
-        scores = flex.double(
-            get_experiment_score_for_coord(x, y)
-            for y in range(-grid, grid + 1)
-            for x in range(-grid, grid + 1)
+            for offset in offsets
         )
 
-        def igrid(x):
-            return x - (widegrid // 2)
-
-        idxs = [igrid(i) * plot_px_sz for i in range(widegrid)]
+    wide_search_scores = None
+    if mm_search_scope:
+        plot_px_sz = experiments[0].detector[0].get_pixel_size()[0]
+        plot_px_sz *= wide_search_binning
+        grid = max(1, int(mm_search_scope / plot_px_sz))
+        offsets = _origin_offset_grid(grid, plot_px_sz, beamr1, beamr2)
+        scores = get_scores_for_offsets(offsets)
+        if wide_search_binning == 1:
+            wide_search_scores = scores
 
         # if there are several similarly high scores, then choose the closest
         # one to the current beam centre
-        potential_offsets = flex.vec3_double()
         if scores.all_eq(0):
             raise Sorry("No valid scores")
         sel = scores > (0.9 * flex.max(scores))
-        for i in sel.iselection():
-            offset = (idxs[i % widegrid]) * beamr1 + (idxs[i // widegrid]) * beamr2
-            potential_offsets.append(offset.elems)
-            # print offset.length(), scores[i]
+        potential_offsets = offsets.select(sel)
         wide_search_offset = matrix.col(
             potential_offsets[flex.min_index(potential_offsets.norms())]
         )
@@ -162,28 +173,35 @@ class simplex_minimizer(object):
         def __init__(self, wide_search_offset):
             self.n = 2
             self.wide_search_offset = wide_search_offset
+            # start from a fixed simplex with one vertex at the wide search offset
+            # (or current origin), so that the search is reproducible
             self.optimizer = simplex_opt(
                 dimension=self.n,
-                matrix=[flex.random_double(self.n) for _ in range(self.n + 1)],
+                matrix=[
+                    flex.double((0.0, 0.0)),
+                    flex.double((0.5, 0.0)),
+                    flex.double((0.0, 0.5)),
+                ],
                 evaluator=self,
                 tolerance=1e-7,
             )
             self.x = self.optimizer.get_solution()
-            self.offset = self.x[0] * 0.2 * beamr1 + self.x[1] * 0.2 * beamr2
+            self.offset = simplex_basis * matrix.col(self.x)
             if self.wide_search_offset is not None:
                 self.offset += self.wide_search_offset
 
         def target(self, vector):
-            trial_origin_offset = vector[0] * 0.2 * beamr1 + vector[1] * 0.2 * beamr2
+            trial_origin_offset = simplex_basis * matrix.col(vector)
             if self.wide_search_offset is not None:
                 trial_origin_offset += self.wide_search_offset
             target = 0
             for i, experiment in enumerate(experiments):
                 target -= _get_origin_offset_score(
                     trial_origin_offset,
-                    solution_lists[i],
+                    direction_lists[i],
                     amax_lists[i],
-                    reflection_lists[i],
+                    lab_coord_lists[i],
+                    phi_lists[i],
                     experiment,
                 )
             return target
@@ -193,20 +211,13 @@ def target(self, vector):
     if plot_search_scope:
         plot_px_sz = experiments[0].get_detector()[0].get_pixel_size()[0]
         grid = max(1, int(mm_search_scope / plot_px_sz))
-        scores = flex.double()
-        for y in range(-grid, grid + 1):
-            for x in range(-grid, grid + 1):
-                new_origin_offset = x * plot_px_sz * beamr1 + y * plot_px_sz * beamr2
-                score = 0
-                for i, experiment in enumerate(experiments):
-                    score += _get_origin_offset_score(
-                        new_origin_offset,
-                        solution_lists[i],
-                        amax_lists[i],
-                        reflection_lists[i],
-                        experiment,
-                    )
-                scores.append(score)
+        if wide_search_scores is not None:
+            # the unbinned wide search has already scored exactly this grid
+            scores = wide_search_scores
+        else:
+            scores = get_scores_for_offsets(
+                _origin_offset_grid(grid, plot_px_sz, beamr1, beamr2)
+            )
 
         def show_plot(widegrid, excursi):
             excursi.reshape(flex.grid(widegrid, widegrid))
@@ -254,51 +265,86 @@ def igrid(x):
     return new_experiments
 
 
+def _origin_offset_grid(grid, px_sz, beamr1, beamr2):
+    """Return the trial origin offsets on a square grid of (2 * grid + 1)^2 points
+    with spacing px_sz in the plane spanned by beamr1 and beamr2. The offsets are
+    in row-major order, with the coordinate along beamr1 varying fastest."""
+
+    steps = np.arange(-grid, grid + 1) * px_sz
+    x, y = np.meshgrid(steps, steps)
+    offsets = np.outer(x.ravel(), beamr1.elems) + np.outer(y.ravel(), beamr2.elems)
+    return flex.vec3_double(flex.double(offsets.ravel()))
+
+
+def _spot_lab_coordinates(spots_mm, detector):
+    """Calculate the lab frame coordinates of the spot centroids on the detector"""
+
+    lab_coords = flex.vec3_double(len(spots_mm))
+    x, y, _ = spots_mm["xyzobs.mm.value"].parts()
+    panel_numbers = spots_mm["panel"]
+    for i_panel, panel in enumerate(detector):
+        sel = panel_numbers == i_panel
+        lab_coords.set_selected(
+            sel, panel.get_lab_coord(flex.vec2_double(x.select(sel), y.select(sel)))
+        )
+    return lab_coords
+
+
+def _trial_rlps(trial_origin_offset, lab_coords, phi, experiment):
+    # Map the spots to reciprocal space as for
+    # flex.reflection_table.map_centroids_to_reciprocal_space, for a detector
+    # translated by the trial origin offset. Key point for this is that the spots
+    # must correspond to detector positions not to the correct RS position =>
+    # ignore any fixed rotation (i.e. treat it as identity)
+    _, rlp = map_lab_coords_to_reciprocal_space(
+        lab_coords + trial_origin_offset.elems,
+        phi,
+        experiment.beam,
+        experiment.goniometer,
+    )
+    return rlp
+
+
 def _get_origin_offset_score(
-    trial_origin_offset, solutions, amax, spots_mm, experiment
+    trial_origin_offset, directions, amax, lab_coords, phi, experiment
 ):
-    trial_detector = dps_extended.get_new_detector(
-        experiment.detector, trial_origin_offset
-    )
-    experiment = copy.deepcopy(experiment)
-    experiment.detector = trial_detector
+    rlp = _trial_rlps(trial_origin_offset, lab_coords, phi, experiment)
+    return _sum_score_detail(rlp, directions, amax=amax)
+
 
-    # Key point for this is that the spots must correspond to detector
-    # positions not to the correct RS position => reset any fixed rotation
-    # to identity
+def _solution_directions(solutions):
+    """Construct the Direction objects for the (at most 20) DPS solutions that are
+    used to score a trial origin offset"""
 
-    experiment.goniometer.set_fixed_rotation((1, 0, 0, 0, 1, 0, 0, 0, 1))
-    spots_mm.map_centroids_to_reciprocal_space([experiment])
-    return _sum_score_detail(spots_mm["rlp"], solutions, amax=amax)
+    nh = min(solutions.size(), 20)  # extended API
+    return [Direction(solutions[t]) for t in range(nh)]
 
 
-def _sum_score_detail(reciprocal_space_vectors, solutions, granularity=None, amax=None):
+def _sum_score_detail(
+    reciprocal_space_vectors, directions, granularity=None, amax=None
+):
     """Evaluates the probability that the trial value of (S0_vector | origin_offset) is correct,
     given the current estimate and the observations.  The trial value comes through the
     reciprocal space vectors, and the current estimate comes through the short list of
-    DPS solutions. Actual return value is a sum of NH terms, one for each DPS solution, each ranging
-    from -1.0 to 1.0"""
+    DPS solution directions. Actual return value is a sum of NH terms, one for each DPS
+    solution, each ranging from -1.0 to 1.0"""
 
-    nh = min(solutions.size(), 20)  # extended API
+    kval_cutoff = reciprocal_space_vectors.size() / 4.0
     sum_score = 0.0
-    for t in range(nh):
+    for direction in directions:
         dfft = Directional_FFT(
-            angle=Direction(solutions[t]),
+            angle=direction,
             xyzdata=reciprocal_space_vectors,
             granularity=5.0,
             amax=amax,  # extended API XXX These values have to come from somewhere!
             F0_cutoff=11,
         )
-        kval = dfft.kval()
-        kmax = dfft.kmax()
-        kval_cutoff = reciprocal_space_vectors.size() / 4.0
-        if kval > kval_cutoff:
+        if dfft.kval() > kval_cutoff:
+            kmax = dfft.kmax()
             ff = dfft.fft_result
             kbeam = ((-dfft.pmin) / dfft.delta_p) + 0.5
             Tkmax = cmath.phase(ff[kmax])
-            backmax = math.cos(
-                Tkmax + (2 * math.pi * kmax * kbeam / (2 * ff.size() - 1))
-            )
+            backmax = math.cos(Tkmax + (TWO_PI * kmax * kbeam / (2 * ff.size() - 1)))
             ### Here it should be possible to calculate a gradient.
             ### Then minimize with respect to two coordinates.  Use lbfgs?  Have second derivatives?
             ### can I do something local to model the cosine wave?
@@ -326,22 +372,13 @@ def run_dps(experiment, spots_mm, max_cell):
 
     # transform input into what DPS needs
     # i.e., construct a flex.vec3 double consisting of mm spots, phi in degrees
-    data = flex.vec3_double()
-    for spot in spots_mm.rows():
-        data.append(
-            (
-                spot["xyzobs.mm.value"][0],
-                spot["xyzobs.mm.value"][1],
-                spot["xyzobs.mm.value"][2] * 180.0 / math.pi,
-            )
-        )
+    x, y, phi = spots_mm["xyzobs.mm.value"].parts()
+    data = flex.vec3_double(x, y, phi * 180.0 / math.pi)
+    panel_addresses = flex.int(spots_mm["panel"].as_numpy_array().astype(np.int32))
 
     logger.info("Running DPS using %i reflections" % len(data))
 
-    DPS.index(
-        raw_spot_input=data,
-        panel_addresses=flex.int(s["panel"] for s in spots_mm.rows()),
-    )
+    DPS.index(raw_spot_input=data, panel_addresses=panel_addresses)
     solutions = DPS.getSolutions()
 
     logger.info(
@@ -364,7 +401,13 @@ def discover_better_experimental_model(
     mm_search_scope=4.0,
     wide_search_binning=1,
     plot_search_scope=False,
+    pool=None,
 ):
+    """Search for a better beam centre using DPS indexing of each experiment.
+
+    If given, the DPS indexing is run using the concurrent.futures executor pool,
+    which allows the worker processes to be reused across repeated calls.
+    Otherwise a process pool with nproc workers is created for this call."""
     assert len(experiments) == len(reflections)
     assert len(experiments) > 0
 
@@ -413,15 +456,20 @@ def discover_better_experimental_model(
     else:
         max_cell = params.max_cell
 
-    with concurrent.futures.ProcessPoolExecutor(max_workers=nproc) as pool:
-        solution_lists = []
-        amax_list = []
-        for result in pool.map(
-            run_dps, experiments, refl_lists, itertools.repeat(max_cell)
-        ):
-            if result.get("solutions"):
-                solution_lists.append(result["solutions"])
-                amax_list.append(result["amax"])
+    if pool is None:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=nproc) as pool:
+            results = list(
+                pool.map(run_dps, experiments, refl_lists, itertools.repeat(max_cell))
+            )
+    else:
+        results = pool.map(run_dps, experiments, refl_lists, itertools.repeat(max_cell))
+
+    solution_lists = []
+    amax_list = []
+    for result in results:
+        if result.get("solutions"):
+            solution_lists.append(result["solutions"])
+            amax_list.append(result["amax"])
 
     if not solution_lists:
         raise Sorry("No solutions found")
@@ -512,20 +560,23 @@ def run(args):
             slice_reflections(refl, params.image_range) for refl in reflections
         ]
 
-    for i in range(params.n_macro_cycles):
-        if params.n_macro_cycles > 1:
-            logger.info("Starting macro cycle %i" % (i + 1))
-        experiments = discover_better_experimental_model(
-            experiments,
-            reflections,
-            params,
-            nproc=params.nproc,
-            d_min=params.d_min,
-            mm_search_scope=params.mm_search_scope,
-            wide_search_binning=params.wide_search_binning,
-            plot_search_scope=params.plot_search_scope,
-        )
-        logger.info("")
+    # reuse the same worker processes for every macro cycle
+    with concurrent.futures.ProcessPoolExecutor(max_workers=params.nproc) as pool:
+        for i in range(params.n_macro_cycles):
+            if params.n_macro_cycles > 1:
+                logger.info("Starting macro cycle %i" % (i + 1))
+            experiments = discover_better_experimental_model(
+                experiments,
+                reflections,
+                params,
+                nproc=params.nproc,
+                d_min=params.d_min,
+                mm_search_scope=params.mm_search_scope,
+                wide_search_binning=params.wide_search_binning,
+                plot_search_scope=params.plot_search_scope,
+                pool=pool,
+            )
+            logger.info("")
 
     logger.info("Saving optimised experiments to %s" % params.output.experiments)
     experiments.as_file(params.output.experiments)
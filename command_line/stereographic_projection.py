@@ -2,12 +2,12 @@
 from __future__ import absolute_import, division, print_function
 
 import json
-import math
 import os
 import sys
 
 import iotbx.phil
 import matplotlib
+import numpy as np
 from cctbx import crystal, miller
 from cctbx.array_family import flex
 from scitbx import matrix
@@ -115,45 +115,43 @@ def stereographic_projection(points, reference_poles):
     # G. K. Stokes, S. R. Keown and D. J. Dyson
 
     assert len(reference_poles) == 3
-    r_0, r_1, r_2 = reference_poles
+    r_0, r_1, r_2 = (np.array(matrix.col(r).normalize().elems) for r in reference_poles)
 
-    projections = flex.vec2_double()
+    r_i = points.as_numpy_array()
+    r_i = r_i / np.linalg.norm(r_i, axis=1)[:, np.newaxis]
 
-    for p in points:
-        r_i = matrix.col(p)
-        # theta is the angle between r_i and the plane normal, r_0
-        cos_theta = r_i.cos_angle(r_0)
-        if cos_theta < 0:
-            r_i = -r_i
-            cos_theta = r_i.cos_angle(r_0)
+    # theta is the angle between r_i and the plane normal, r_0. Points in the
+    # opposite hemisphere are reflected through the origin
+    cos_theta = r_i.dot(r_0)
+    r_i[cos_theta < 0] *= -1
+    cos_theta = np.clip(np.abs(cos_theta), -1, 1)
 
-        # alpha is the angle between r_i and r_1
-        cos_alpha = r_i.cos_angle(r_1)
-        theta = math.acos(cos_theta)
-        cos_phi = cos_alpha / math.sin(theta)
-        if abs(cos_phi) > 1:
-            cos_phi = math.copysign(1, cos_phi)
-        phi = math.acos(cos_phi)
+    # alpha is the angle between r_i and r_1
+    cos_alpha = r_i.dot(r_1)
+    theta = np.arccos(cos_theta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_phi = np.clip(cos_alpha / np.sin(theta), -1, 1)
+    # a point at the plane normal projects onto the origin, whatever phi is
+    cos_phi[np.isnan(cos_phi)] = 1
+    phi = np.arccos(cos_phi)
 
-        N = r_i.dot(r_2)
-        r = math.tan(theta / 2)
-        x = r * cos_phi
-        y = r * math.sin(phi)
-        y = math.copysign(y, N)
+    N = r_i.dot(r_2)
+    r = np.tan(theta / 2)
+    x = r * cos_phi
+    y = np.copysign(r * np.sin(phi), N)
 
-        projections.append((x, y))
+    return flex.vec2_double(flex.double(x), flex.double(y))
 
-    return projections
 
+def unique_reduced_miller_indices(miller_indices):
+    """Divide each miller index by the greatest common divisor of its elements
+    and return the unique reduced indices, in sorted order"""
 
-def gcd_list(l):
-    # greatest common divisor for a list of numbers
-    from scitbx.math import gcd_int_simple as gcd
-
-    result = l[0]
-    for i in range(1, len(l)):
-        result = gcd(result, l[i])
-    return result
+    hkl = miller_indices.as_vec3_double().as_numpy_array().astype(np.int64)
+    gcd = np.gcd.reduce(hkl, axis=1)
+    hkl = hkl[gcd > 0] // gcd[gcd > 0, np.newaxis]
+    hkl = np.unique(hkl, axis=0)
+    return flex.miller_index([tuple(row) for row in hkl.tolist()])
 
 
 def run(args):
@@ -191,13 +189,10 @@ def run(args):
         miller_indices = flex.miller_index(params.hkl)
     elif params.hkl_limit is not None:
         limit = params.hkl_limit
-        miller_indices = flex.miller_index()
-        for h in range(-limit, limit + 1):
-            for k in range(-limit, limit + 1):
-                for l in range(-limit, limit + 1):
-                    if (h, k, l) == (0, 0, 0):
-                        continue
-                    miller_indices.append((h, k, l))
+        hkl = np.mgrid[-limit : limit + 1, -limit : limit + 1, -limit : limit + 1]
+        hkl = hkl.reshape(3, -1).T
+        hkl = hkl[hkl.any(axis=1)]
+        miller_indices = flex.miller_index([tuple(row) for row in hkl.tolist()])
 
     crystals = experiments.crystals()
 
@@ -213,17 +208,7 @@ def run(args):
     miller_indices = d_spacings.indices()
 
     # find the greatest common factor (divisor) between miller indices
-    miller_indices_unique = flex.miller_index()
-    for hkl in miller_indices:
-        gcd = gcd_list(hkl)
-        if gcd > 1:
-            miller_indices_unique.append(tuple(int(h / gcd) for h in hkl))
-        elif gcd < 1:
-            pass
-        else:
-            miller_indices_unique.append(hkl)
-    miller_indices = miller_indices_unique
-    miller_indices = flex.miller_index(list(set(miller_indices)))
+    miller_indices = unique_reduced_miller_indices(miller_indices)
 
     ref_crystal = crystals[0]
     U = matrix.sqr(ref_crystal.get_U())
@@ -256,7 +241,9 @@ def run(args):
     if params.frame == "crystal":
         U = matrix.identity(3)
 
-    reciprocal_space_points = list(R * U * B) * miller_indices.as_vec3_double()
+    # the same miller indices are transformed for every crystal
+    hkl = miller_indices.as_vec3_double()
+    reciprocal_space_points = list(R * U * B) * hkl
     projections_ref = stereographic_projection(reciprocal_space_points, reference_poles)
 
     projections_all = [projections_ref]
@@ -281,23 +268,31 @@ def run(args):
                     )
             else:
                 U = matrix.sqr(cryst.get_U())
-            reciprocal_space_points = (
-                list(R * U * matrix.sqr(cryst.get_B()))
-                * miller_indices.as_vec3_double()
-            )
+            reciprocal_space_points = list(R * U * matrix.sqr(cryst.get_B())) * hkl
             projections = stereographic_projection(
                 reciprocal_space_points, reference_poles
             )
             projections_all.append(projections)
 
     if params.save_coordinates:
+        hkl_np = hkl.as_numpy_array()
         with open("projections.txt", "w") as f:
             f.write("crystal h k l x y" + os.linesep)
             for i_cryst, projections in enumerate(projections_all):
-                for hkl, proj in zip(miller_indices, projections):
-                    f.write("%i " % (i_cryst + 1))
-                    f.write("%i %i %i " % hkl)
-                    f.write(("%f %f" + os.linesep) % proj)
+                x, y = projections.parts()
+                np.savetxt(
+                    f,
+                    np.column_stack(
+                        (
+                            np.full(len(hkl_np), i_cryst + 1),
+                            hkl_np,
+                            x.as_numpy_array(),
+                            y.as_numpy_array(),
+                        )
+                    ),
+                    fmt="%i %i %i %i %f %f",
+                    newline=os.linesep,
+                )
 
     if params.plot.filename:
         epochs = None
@@ -324,6 +319,28 @@ def run(args):
         )
 
 
+def _non_overlapping_label_indices(xy, tolerance=1e-3):
+    """Return the indices of the points in xy that do not lie within tolerance
+    of any earlier point, in input order"""
+
+    # bin the points on a grid of size tolerance, so that any point within
+    # tolerance of a given point lies in the same or a neighbouring bin
+    cells = np.floor(xy / tolerance).astype(np.int64).tolist()
+    binned = {}
+    selected = []
+    for j, (cx, cy) in enumerate(cells):
+        earlier = [
+            i
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            for i in binned.get((cx + dx, cy + dy), [])
+        ]
+        if not earlier or np.hypot(*(xy[earlier] - xy[j]).T).min() >= tolerance:
+            selected.append(j)
+        binned.setdefault((cx, cy), []).append(j)
+    return selected
+
+
 def plot_projections(
     projections,
     filename=None,
@@ -379,14 +396,12 @@ def plot_projections(
                 edgecolors="none",
             )
             if label_indices:
-                for j, (hkl, proj) in enumerate(zip(label_indices, projections)):
-                    # hack to not write two labels on top of each other
-                    p1, p2 = (projections - proj).parts()
-                    if (flex.sqrt(flex.pow2(p1) + flex.pow2(p2)) < 1e-3).iselection()[
-                        0
-                    ] != j:
-                        continue
-                    pyplot.text(proj[0], proj[1], str(hkl), fontsize=font_size)
+                # hack to not write two labels on top of each other
+                xy = np.column_stack((x.as_numpy_array(), y.as_numpy_array()))
+                for j in _non_overlapping_label_indices(xy):
+                    pyplot.text(
+                        xy[j, 0], xy[j, 1], str(label_indices[j]), fontsize=font_size
+                    )
     fig.axes[0].set_aspect("equal")
     pyplot.xlim(-1.1, 1.1)
     pyplot.ylim(-1.1, 1.1)
@@ -98,28 +98,28 @@ def test_centroid_bias(self):
 
     @classmethod
     def generate_data(cls):
+        import numpy as np
         from scitbx.array_family import flex
-        from random import random, randint
-
-        # Generate a 3d array of pixels and points
-        cls.points3d = flex.vec3_double(flex.grid(5, 5, 5))
-        cls.pixels3d = flex.double(flex.grid(5, 5, 5))
-        cls.mask3d = flex.bool(flex.grid(5, 5, 5))
-        for k in range(0, 5):
-            for j in range(0, 5):
-                for i in range(0, 5):
-                    cls.points3d[k, j, i] = (i + 0.5, j + 0.5, k + 0.5)
-                    cls.pixels3d[k, j, i] = random()
-                    cls.mask3d[k, j, i] = bool(randint(0, 1))
-
-        cls.points2d = flex.vec2_double(flex.grid(5, 5))
-        cls.pixels2d = flex.double(flex.grid(5, 5))
-        cls.mask2d = flex.bool(flex.grid(5, 5))
-        for j in range(0, 5):
-            for i in range(0, 5):
-                cls.points2d[j, i] = cls.points3d[0, j, i][0:2]
-                cls.pixels2d[j, i] = cls.pixels3d[0, j, i]
-                cls.mask2d[j, i] = cls.mask3d[0, j, i]
+
+        # Generate a 3d array of pixels and points, where points[k, j, i] is
+        # (i + 0.5, j + 0.5, k + 0.5)
+        k, j, i = np.mgrid[0:5, 0:5, 0:5] + 0.5
+        x, y, z = (flex.double(a.ravel()) for a in (i, j, k))
+        pixels = flex.random_double(125)
+        mask = flex.random_bool(125, 0.5)
+
+        # The 2d arrays are the k = 0 slice of the 3d arrays
+        cls.points2d = flex.vec2_double(x[:25], y[:25])
+        cls.pixels2d = pixels[:25]
+        cls.mask2d = mask[:25]
+        for a in (cls.points2d, cls.pixels2d, cls.mask2d):
+            a.reshape(flex.grid(5, 5))
+
+        cls.points3d = flex.vec3_double(x, y, z)
+        cls.pixels3d = pixels
+        cls.mask3d = mask
+        for a in (cls.points3d, cls.pixels3d, cls.mask3d):
+            a.reshape(flex.grid(5, 5, 5))
 
     @classmethod
     def calculate_gold(cls):
@@ -130,245 +130,52 @@ def calculate_gold(cls):
 
     @classmethod
     def calculate_gold2d(cls):
-        from scitbx.array_family import flex
-        from scitbx import matrix
-
-        r_tot = 0.0
-        c_tot = 0.0
-        d_tot = 0.0
-
-        for (r, c), d in zip(cls.points2d, cls.pixels2d):
-            r_tot += d * r
-            c_tot += d * c
-            d_tot += d
-
-        cls.gold2d = matrix.col((r_tot / d_tot, c_tot / d_tot))
-        _r, _c = cls.gold2d
-
-        r_tot = 0.0
-        c_tot = 0.0
-
-        for (r, c), d in zip(cls.points2d, cls.pixels2d):
-            r_tot += d * (r - _r) ** 2
-            c_tot += d * (c - _c) ** 2
-
-        _sr = r_tot / d_tot
-        _sc = c_tot / d_tot
-
-        cls.gold2dvar = matrix.col((_sr, _sc))
-
-        # r_tot = 0.0
-        # c_tot = 0.0
-
-        # for (r, c), d in zip(cls.points2d, cls.pixels2d):
-        #  r_tot += d * (r - _r) ** 2
-        #  c_tot += d * (c - _c) ** 2
-
-        # _sr = r_tot / (d_tot-1)
-        # _sc = c_tot / (d_tot-1)
-
-        # cls.gold2dubvar = matrix.col((_sr, _sc))
-
-        pixel_x, pixel_y = zip(*cls.points2d)
-        xc = flex.mean_and_variance(flex.double(pixel_x), cls.pixels2d.as_1d())
-        yc = flex.mean_and_variance(flex.double(pixel_y), cls.pixels2d.as_1d())
-        cls.gold2dubvar = matrix.col(
-            (xc.gsl_stats_wvariance(), yc.gsl_stats_wvariance())
+        cls.gold2d, cls.gold2dvar, cls.gold2dubvar = _weighted_centroid(
+            cls.points2d, cls.pixels2d
         )
 
     @classmethod
     def calculate_gold3d(cls):
-        from scitbx.array_family import flex
-        from scitbx import matrix
-
-        f_tot = 0.0
-        r_tot = 0.0
-        c_tot = 0.0
-        d_tot = 0.0
-
-        for (f, r, c), d in zip(cls.points3d, cls.pixels3d):
-            f_tot += d * f
-            r_tot += d * r
-            c_tot += d * c
-            d_tot += d
-
-        cls.gold3d = matrix.col((f_tot / d_tot, r_tot / d_tot, c_tot / d_tot))
-
-        _f, _r, _c = cls.gold3d
-
-        f_tot = 0.0
-        r_tot = 0.0
-        c_tot = 0.0
-
-        for (f, r, c), d in zip(cls.points3d, cls.pixels3d):
-            f_tot += d * (f - _f) ** 2
-            r_tot += d * (r - _r) ** 2
-            c_tot += d * (c - _c) ** 2
-
-        _sf = f_tot / d_tot
-        _sr = r_tot / d_tot
-        _sc = c_tot / d_tot
-
-        cls.gold3dvar = matrix.col((_sf, _sr, _sc))
-
-        # f_tot = 0.0
-        # r_tot = 0.0
-        # c_tot = 0.0
-
-        # for (f, r, c), d in zip(cls.points3d, cls.pixels3d):
-        #  f_tot += d * (f - _f) ** 2
-        #  r_tot += d * (r - _r) ** 2
-        #  c_tot += d * (c - _c) ** 2
-
-        # _sf = f_tot / (d_tot-1)
-        # _sr = r_tot / (d_tot-1)
-        # _sc = c_tot / (d_tot-1)
-
-        # cls.gold3dubvar = matrix.col((_sf, _sr, _sc))
-
-        pixel_x, pixel_y, pixel_z = zip(*cls.points3d)
-        xc = flex.mean_and_variance(flex.double(pixel_x), cls.pixels3d.as_1d())
-        yc = flex.mean_and_variance(flex.double(pixel_y), cls.pixels3d.as_1d())
-        zc = flex.mean_and_variance(flex.double(pixel_z), cls.pixels3d.as_1d())
-        cls.gold3dubvar = matrix.col(
-            (
-                xc.gsl_stats_wvariance(),
-                yc.gsl_stats_wvariance(),
-                zc.gsl_stats_wvariance(),
-            )
+        cls.gold3d, cls.gold3dvar, cls.gold3dubvar = _weighted_centroid(
+            cls.points3d, cls.pixels3d
         )
 
     @classmethod
     def calculate_gold_masked2d(cls):
-        from scitbx.array_family import flex
-        from scitbx import matrix
-
-        r_tot = 0.0
-        c_tot = 0.0
-        d_tot = 0.0
-
-        for (r, c), d, m in zip(cls.points2d, cls.pixels2d, cls.mask2d):
-            if m:
-                r_tot += d * r
-                c_tot += d * c
-                d_tot += d
-
-        cls.goldmasked2d = matrix.col((r_tot / d_tot, c_tot / d_tot))
-
-        _r, _c = cls.goldmasked2d
-
-        r_tot = 0.0
-        c_tot = 0.0
-
-        for (r, c), d, m in zip(cls.points2d, cls.pixels2d, cls.mask2d):
-            if m:
-                r_tot += d * (r - _r) ** 2
-                c_tot += d * (c - _c) ** 2
-
-        _sr = r_tot / d_tot
-        _sc = c_tot / d_tot
-
-        cls.goldmasked2dvar = matrix.col((_sr, _sc))
-
-        # r_tot = 0.0
-        # c_tot = 0.0
-
-        # for (r, c), d, m in zip(cls.points2d, cls.pixels2d, cls.mask2d):
-        #  if m:
-        #    r_tot += d * (r - _r) ** 2
-        #    c_tot += d * (c - _c) ** 2
-
-        # _sr = r_tot / (d_tot-1)
-        # _sc = c_tot / (d_tot-1)
-
-        # cls.goldmasked2dubvar = matrix.col((_sr, _sc))
-
-        pixel_x = flex.double()
-        pixel_y = flex.double()
-        pixel_d = flex.double()
-        for (x, y), d, m in zip(cls.points2d, cls.pixels2d, cls.mask2d):
-            if m:
-                pixel_x.append(x)
-                pixel_y.append(y)
-                pixel_d.append(d)
-
-        xc = flex.mean_and_variance(flex.double(pixel_x), pixel_d)
-        yc = flex.mean_and_variance(flex.double(pixel_y), pixel_d)
-        cls.goldmasked2dubvar = matrix.col(
-            (xc.gsl_stats_wvariance(), yc.gsl_stats_wvariance())
-        )
+        (
+            cls.goldmasked2d,
+            cls.goldmasked2dvar,
+            cls.goldmasked2dubvar,
+        ) = _weighted_centroid(cls.points2d, cls.pixels2d, cls.mask2d)
 
     @classmethod
     def calculate_gold_masked3d(cls):
-        from scitbx.array_family import flex
-        from scitbx import matrix
-
-        f_tot = 0.0
-        r_tot = 0.0
-        c_tot = 0.0
-        d_tot = 0.0
-
-        for (f, r, c), d, m in zip(cls.points3d, cls.pixels3d, cls.mask3d):
-            if m:
-                f_tot += d * f
-                r_tot += d * r
-                c_tot += d * c
-                d_tot += d
-
-        cls.goldmasked3d = matrix.col((f_tot / d_tot, r_tot / d_tot, c_tot / d_tot))
-
-        _f, _r, _c = cls.goldmasked3d
-
-        f_tot = 0.0
-        r_tot = 0.0
-        c_tot = 0.0
-
-        for (f, r, c), d, m in zip(cls.points3d, cls.pixels3d, cls.mask3d):
-            if m:
-                f_tot += d * (f - _f) ** 2
-                r_tot += d * (r - _r) ** 2
-                c_tot += d * (c - _c) ** 2
-
-        _sf = f_tot / d_tot
-        _sr = r_tot / d_tot
-        _sc = c_tot / d_tot
-
-        cls.goldmasked3dvar = matrix.col((_sf, _sr, _sc))
-
-        # f_tot = 0.0
-        # r_tot = 0.0
-        # c_tot = 0.0
-
-        # for (f, r, c), d, m in zip(cls.points3d, cls.pixels3d, cls.mask3d):
-        #  if m:
-        #    f_tot += d * (f - _f) ** 2
-        #    r_tot += d * (r - _r) ** 2
-        #    c_tot += d * (c - _c) ** 2
-
-        # _sf = f_tot / (d_tot-1)
-        # _sr = r_tot / (d_tot-1)
-        # _sc = c_tot / (d_tot-1)
-
-        # cls.goldmasked3dubvar = matrix.col((_sf, _sr, _sc))
-
-        pixel_x = flex.double()
-        pixel_y = flex.double()
-        pixel_z = flex.double()
-        pixel_d = flex.double()
-        for (x, y, z), d, m in zip(cls.points3d, cls.pixels3d, cls.mask3d):
-            if m:
-                pixel_x.append(x)
-                pixel_y.append(y)
-                pixel_z.append(z)
-                pixel_d.append(d)
-
-        xc = flex.mean_and_variance(flex.double(pixel_x), pixel_d)
-        yc = flex.mean_and_variance(flex.double(pixel_y), pixel_d)
-        zc = flex.mean_and_variance(flex.double(pixel_z), pixel_d)
-        cls.goldmasked3dubvar = matrix.col(
-            (
-                xc.gsl_stats_wvariance(),
-                yc.gsl_stats_wvariance(),
-                zc.gsl_stats_wvariance(),
-            )
-        )
+        (
+            cls.goldmasked3d,
+            cls.goldmasked3dvar,
+            cls.goldmasked3dubvar,
+        ) = _weighted_centroid(cls.points3d, cls.pixels3d, cls.mask3d)
+
+
+def _weighted_centroid(points, pixels, mask=None):
+    """Calculate the reference pixel-weighted mean, variance and unbiased
+    variance of the point coordinates, optionally only for masked-in pixels"""
+    import numpy as np
+    from scitbx.array_family import flex
+    from scitbx import matrix
+
+    coords = points.as_1d().parts()
+    d = pixels.as_1d()
+    if mask is not None:
+        coords = [c.select(mask.as_1d()) for c in coords]
+        d = d.select(mask.as_1d())
+
+    p = np.column_stack([c.as_numpy_array() for c in coords])
+    w = d.as_numpy_array()
+    d_tot = w.sum()
+    # accumulate the first and second moments in a single pass over the points
+    mean = np.einsum("i,ij->j", w, p) / d_tot
+    var = np.einsum("i,ij,ij->j", w, p, p) / d_tot - mean * mean
+
+    ubvar = [flex.mean_and_variance(c, d).gsl_stats_wvariance() for c in coords]
+    return matrix.col(mean.tolist()), matrix.col(var.tolist()), matrix.col(ubvar)
@@ -145,36 +145,34 @@ def get_fd_gradients(self, pred_param, ref_predictor):
 
             # save parameter value
             val = p_vals[i]
+            delta = deltas[i]
 
             # calc reverse state
-            p_vals[i] -= deltas[i] / 2.0
+            p_vals[i] -= delta / 2.0
             pred_param.set_param_vals(p_vals)
 
             ref_predictor(self.reflections)
 
-            x, y, _ = self.reflections["xyzcal.mm"].deep_copy().parts()
-            delpsi = self.reflections["delpsical.rad"].deep_copy()
-            rev_state = flex.vec3_double(x, y, delpsi)
+            # parts() already returns new arrays, so only delpsi needs copying
+            rev_x, rev_y, _ = self.reflections["xyzcal.mm"].parts()
+            rev_delpsi = self.reflections["delpsical.rad"].deep_copy()
 
             # calc forward state
-            p_vals[i] += deltas[i]
+            p_vals[i] += delta
             pred_param.set_param_vals(p_vals)
 
             ref_predictor(self.reflections)
 
-            x, y, _ = self.reflections["xyzcal.mm"].deep_copy().parts()
-            delpsi = self.reflections["delpsical.rad"].deep_copy()
-            fwd_state = flex.vec3_double(x, y, delpsi)
+            fwd_x, fwd_y, _ = self.reflections["xyzcal.mm"].parts()
+            fwd_delpsi = self.reflections["delpsical.rad"]
 
             # reset parameter to saved value
             p_vals[i] = val
 
             # finite difference
-            fd = fwd_state - rev_state
-            x_grads, y_grads, delpsi_grads = fd.parts()
-            x_grads /= deltas[i]
-            y_grads /= deltas[i]
-            delpsi_grads /= deltas[i]
+            x_grads = (fwd_x - rev_x) / delta
+            y_grads = (fwd_y - rev_y) / delta
+            delpsi_grads = (fwd_delpsi - rev_delpsi) / delta
 
             fd_grads.append(
                 {
@@ -0,0 +1,113 @@
+"""
+Tests for the construction of the Jacobian and the gradient reductions by
+Target classes
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import random
+
+import pytest
+
+from scitbx import sparse
+from dials.array_family import flex
+from dials.algorithms.refinement.target import SparseGradientsMixin, Target
+
+
+def _random_gradients(nref, nparam, ndim=3):
+    return [[flex.random_double(nref) for _ in range(nparam)] for _ in range(ndim)]
+
+
+def _random_sparse_gradients(nref, nparam, ndim=3, seed=42):
+    # random sparse gradient vectors, with every other element left unset
+    rng = random.Random(seed)
+    sparse_grads_each_dim = []
+    for _ in range(ndim):
+        sparse_grads = []
+        for _ in range(nparam):
+            v = sparse.vector(nref)
+            for j in range(1, nref, 2):
+                v[j] = rng.random()
+            sparse_grads.append(v)
+        sparse_grads_each_dim.append(sparse_grads)
+    return sparse_grads_each_dim
+
+
+def test_build_jacobian_dense():
+
+    nref, nparam = 7, 4
+    grads_each_dim = _random_gradients(nref, nparam)
+
+    jacobian = Target._build_jacobian(grads_each_dim, nelem=3 * nref, nparam=nparam)
+
+    assert jacobian.all() == (3 * nref, nparam)
+    for i in range(nparam):
+        col = jacobian.matrix_copy_column(i)
+        for idim, grads in enumerate(grads_each_dim):
+            assert list(col[idim * nref : (idim + 1) * nref]) == list(grads[i])
+
+
+def test_build_jacobian_sparse_matches_dense():
+
+    nref, nparam = 7, 4
+    sparse_grads_each_dim = _random_sparse_gradients(nref, nparam)
+    dense_grads_each_dim = [
+        [g.as_dense_vector() for g in grads] for grads in sparse_grads_each_dim
+    ]
+
+    dense = Target._build_jacobian(dense_grads_each_dim, nelem=3 * nref, nparam=nparam)
+    jacobian = SparseGradientsMixin._build_jacobian(
+        sparse_grads_each_dim, nelem=3 * nref, nparam=nparam
+    )
+
+    assert jacobian.n_rows == 3 * nref
+    assert jacobian.n_cols == nparam
+    assert list(jacobian.as_dense_matrix()) == list(dense)
+
+
+def _split(a, nref, ndim=3):
+    return [a[i * nref : (i + 1) * nref] for i in range(ndim)]
+
+
+def _reference_reductions(grads, w_resid, weights):
+    # the original calculation, concatenating the gradients for all dimensions
+    g = flex.double()
+    for e in grads:
+        g.extend(e)
+    return flex.sum(w_resid * g), flex.sum(weights * g * g)
+
+
+def test_gradient_reductions_dense():
+
+    nref, nparam = 7, 4
+    grads_each_dim = _random_gradients(nref, nparam)
+    w_resid = flex.random_double(3 * nref) - 0.5
+    weights = flex.random_double(3 * nref)
+
+    for i in range(nparam):
+        grads = [g[i] for g in grads_each_dim]
+        dL_dp, curvature = Target._gradient_reductions(
+            grads, _split(w_resid, nref), _split(weights, nref)
+        )
+        ref_dL_dp, ref_curvature = _reference_reductions(grads, w_resid, weights)
+        assert dL_dp == pytest.approx(ref_dL_dp)
+        assert curvature == pytest.approx(ref_curvature)
+
+
+def test_gradient_reductions_sparse_matches_dense():
+
+    nref, nparam = 7, 4
+    sparse_grads_each_dim = _random_sparse_gradients(nref, nparam)
+    w_resid = flex.random_double(3 * nref) - 0.5
+    weights = flex.random_double(3 * nref)
+
+    for i in range(nparam):
+        sparse_grads = [g[i] for g in sparse_grads_each_dim]
+        dense_grads = [g.as_dense_vector() for g in sparse_grads]
+
+        dL_dp, curvature = SparseGradientsMixin._gradient_reductions(
+            sparse_grads, _split(w_resid, nref), _split(weights, nref)
+        )
+        ref_dL_dp, ref_curvature = _reference_reductions(dense_grads, w_resid, weights)
+        assert dL_dp == pytest.approx(ref_dL_dp)
+        assert curvature == pytest.approx(ref_curvature)
@@ -72,22 +72,25 @@ def test(dials_data):
     shoebox_masker = shoebox.MaskOverlapping()
     shoebox_masker(shoeboxes, coords, adjacency_list)
 
-    # Loop through all edges
-    overlapping = []
-    for e in adjacency_list.edges():
-        v1, v2 = adjacency_list.source(e), adjacency_list.target(e)
-        overlapping.append(v1)
-        overlapping.append(v2)
-
-    # Ensure elements are unique
-    overlapping = set(overlapping)
+    # Get the unique reflections involved in any edge
+    overlapping = np.unique(
+        [
+            v
+            for e in adjacency_list.edges()
+            for v in (adjacency_list.source(e), adjacency_list.target(e))
+        ]
+    ).astype(int)
 
     # Ensure we have some overlaps
     assert len(overlapping) > 0
 
     # Get all non-overlapping reflections
-    all_r = set(range(len(reflections)))
-    non_overlapping = all_r.difference(overlapping)
+    non_overlapping = np.setdiff1d(
+        np.arange(len(reflections)), overlapping, assume_unique=True
+    )
+
+    # Indices are passed back to flex and the adjacency list, so use Python ints
+    overlapping, non_overlapping = overlapping.tolist(), non_overlapping.tolist()
 
     # Run the tests
     tst_non_overlapping(reflections, non_overlapping, detector[0].get_image_size())
@@ -107,66 +110,48 @@ def tst_non_overlapping(reflections, non_overlapping, image_size):
 
 def tst_overlapping(reflections, overlapping, adjacency_list, image_size):
     """Ensure masks for overlapping reflections are set properly."""
-    from scitbx import matrix
     from dials.algorithms import shoebox
 
-    # Loop through all overlaps
+    # Extract the bounding boxes and centroids as (N, 6) and (N, 3) arrays
     shoeboxes = reflections["shoebox"]
-    coord = reflections["xyzcal.px"]
+    bboxes = np.column_stack([b.as_numpy_array() for b in reflections["bbox"].parts()])
+    coords = np.column_stack(
+        [c.as_numpy_array() for c in reflections["xyzcal.px"].parts()]
+    )
+
+    # Loop through all overlaps
     for i in overlapping:
         r1 = shoeboxes[i]
-        bbox_1 = r1.bbox
-        r1_coord = matrix.col(coord[i])
+        lower_1, upper_1 = bboxes[i, ::2], bboxes[i, 1::2]
 
         # Create a mask that we expect
-        r1_size = (bbox_1[5] - bbox_1[4], bbox_1[3] - bbox_1[2], bbox_1[1] - bbox_1[0])
-        expected_mask = np.zeros(shape=r1_size, dtype=np.int32)
-        expected_mask[:, :, :] = shoebox.MaskCode.Valid
+        expected_mask = np.full(
+            tuple(upper_1 - lower_1)[::-1], shoebox.MaskCode.Valid, dtype=np.int32
+        )
 
         # Loop through all reflections which this reflection overlaps
         for j in adjacency_list.adjacent_vertices(i):
-            r2 = shoeboxes[j]
-            bbox_2 = r2.bbox
-            r2_coord = matrix.col(coord[j])
-
-            # Get bounding box of intersection
-            bbox_3 = (
-                max(bbox_1[0], bbox_2[0]),
-                min(bbox_1[1], bbox_2[1]),
-                max(bbox_1[2], bbox_2[2]),
-                min(bbox_1[3], bbox_2[3]),
-                max(bbox_1[4], bbox_2[4]),
-                min(bbox_1[5], bbox_2[5]),
-            )
-
-            # Check intersection is valid
-            assert bbox_3[0] < bbox_3[1]
-            assert bbox_3[2] < bbox_3[3]
-            assert bbox_3[4] < bbox_3[5]
-
-            # Get the coordinates are all mask values
-            mask_coord = []
-            for k in range(bbox_3[4], bbox_3[5]):
-                for j in range(bbox_3[2], bbox_3[3]):
-                    for i in range(bbox_3[0], bbox_3[1]):
-                        mask_coord.append(matrix.col((i + 0.5, j + 0.5, k + 0.5)))
-
-            def dist(a, m):
-                return np.array([(a - b).length() for b in m])
-
-            # Find the indices in the intersection area where r2 is closer to
+
+            # Get bounding box of intersection and check it is valid
+            lower_3 = np.maximum(lower_1, bboxes[j, ::2])
+            upper_3 = np.minimum(upper_1, bboxes[j, 1::2])
+            assert np.all(lower_3 < upper_3)
+
+            # Get the coordinates of the pixel centres in the intersection
+            (x0, y0, z0), (x1, y1, z1) = lower_3, upper_3
+            kk, jj, ii = np.ogrid[z0:z1, y0:y1, x0:x1]
+            kk, jj, ii = kk + 0.5, jj + 0.5, ii + 0.5
+
+            def dist_sq(a):
+                return (ii - a[0]) ** 2 + (jj - a[1]) ** 2 + (kk - a[2]) ** 2
+
+            # Find the points in the intersection area where r2 is closer to
             # the point than r1
-            ind = np.where(dist(r1_coord, mask_coord) > dist(r2_coord, mask_coord))[0]
+            r2_closer = dist_sq(coords[i]) > dist_sq(coords[j])
 
             # Set the mask values for r1 where r2 is closer to 0
-            k0, k1 = bbox_3[4] - bbox_1[4], bbox_3[5] - bbox_1[4]
-            j0, j1 = bbox_3[2] - bbox_1[2], bbox_3[3] - bbox_1[2]
-            i0, i1 = bbox_3[0] - bbox_1[0], bbox_3[1] - bbox_1[0]
-            intersect_mask = expected_mask[k0:k1, j0:j1, i0:i1]
-            intersect_mask_1d = intersect_mask.reshape(-1)
-            intersect_mask_1d[ind] = 0
-            intersect_mask[:, :] = intersect_mask_1d.reshape(intersect_mask.shape)
-            expected_mask[k0:k1, j0:j1, i0:i1] = intersect_mask
+            (i0, j0, k0), (i1, j1, k1) = lower_3 - lower_1, upper_3 - lower_1
+            expected_mask[k0:k1, j0:j1, i0:i1][r2_closer] = 0
 
         # Check the masks are the same
         calculated_mask = r1.mask.as_numpy_array()
@@ -1,5 +1,7 @@
 from __future__ import absolute_import, division, print_function
 
+import pytest
+
 from dials.algorithms.symmetry import origin
 from dials.array_family import flex
 
@@ -14,3 +16,43 @@ def test_origin_offset_miller_indices():
     )
 
     assert ref == omi
+
+
+def test_compute_indexed_data_correlation():
+    from cctbx import crystal, miller
+
+    cs = crystal.symmetry(unit_cell=(10, 11, 12, 90, 90, 90), space_group_symbol="P1")
+    mi = flex.miller_index(
+        [(h, k, l) for h in range(5) for k in range(5) for l in range(1, 6)]
+    )
+    data_a = flex.random_double(len(mi))
+    data_b = flex.random_double(len(mi))
+    omi = origin.offset_miller_indices(mi, (0, 0, 1))
+
+    n, cc = origin._compute_indexed_data_correlation(mi, data_a, omi, data_b)
+    ref_n, ref_cc = origin.compute_miller_set_correlation(
+        miller.set(cs, mi).array(data_a), miller.set(cs, omi).array(data_b)
+    )
+    assert n == ref_n == 100
+    assert cc == pytest.approx(ref_cc)
+
+
+def test_compute_indexed_data_correlation_with_repeated_indices():
+    from cctbx import crystal, miller
+
+    # unmerged data, with repeated indices in both arrays
+    cs = crystal.symmetry(unit_cell=(10, 11, 12, 90, 90, 90), space_group_symbol="P1")
+    mi = flex.miller_index(
+        [(h, k, l) for h in range(3) for k in range(3) for l in range(1, 4)] * 3
+    )
+    mi.extend(flex.miller_index([(0, 0, 1), (0, 0, 2), (1, 1, 1)]))
+    data_a = flex.random_double(len(mi))
+    data_b = flex.random_double(len(mi))
+    omi = origin.offset_miller_indices(mi, (0, 0, 1))
+
+    n, cc = origin._compute_indexed_data_correlation(mi, data_a, omi, data_b)
+    ref_n, ref_cc = origin.compute_miller_set_correlation(
+        miller.set(cs, mi).array(data_a), miller.set(cs, omi).array(data_b)
+    )
+    assert n == ref_n
+    assert cc == pytest.approx(ref_cc)
@@ -1,7 +1,16 @@
 from __future__ import absolute_import, division, print_function
 
 import os
+import random
+
 import procrunner
+import pytest
+
+from cctbx import crystal, miller, sgtbx
+from dials.array_family import flex
+from dials.command_line.check_indexing_symmetry import (
+    get_symop_correlation_coefficients,
+)
 
 
 def test(dials_regression, run_in_tmpdir):
@@ -24,3 +33,28 @@ def test(dials_regression, run_in_tmpdir):
         ]
     )
     assert not result.returncode and not result.stderr
+
+
+def test_get_symop_correlation_coefficients_with_repeated_indices():
+    # unmerged data, so many of the Miller indices are repeated
+    rng = random.Random(42)
+    indices = flex.miller_index()
+    while len(indices) < 500:
+        hkl = tuple(rng.randint(-3, 3) for _ in range(3))
+        if hkl != (0, 0, 0):
+            indices.append(hkl)
+    cs = crystal.symmetry(unit_cell=(40, 50, 60, 90, 100, 90), space_group_symbol="C2")
+    ms = miller.set(cs, indices, anomalous_flag=False).array(
+        data=flex.double(rng.random() for _ in range(len(indices)))
+    )
+
+    ccs, n_refs = get_symop_correlation_coefficients(ms)
+
+    # compare with the common_sets/correlation calculation it replaced
+    smxs = list(ms.space_group().smx())
+    assert len(ccs) == len(n_refs) == len(smxs)
+    for smx, cc, n_ref in zip(smxs, ccs, n_refs):
+        reindexed = ms.change_basis(sgtbx.change_of_basis_op(smx))
+        intensity, intensity_rdx = reindexed.common_sets(ms)
+        assert n_ref == intensity.size()
+        assert cc == pytest.approx(intensity.correlation(intensity_rdx).coefficient())
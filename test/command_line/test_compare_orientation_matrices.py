@@ -2,17 +2,20 @@
 
 import os
 
-from libtbx import easy_run
+import procrunner
 
 
 def test_compare_orientation_matrices(dials_regression, run_in_tmpdir):
     path = os.path.join(dials_regression, "refinement_test_data", "i04_weak_data")
-    cmd = (
-        "dials.compare_orientation_matrices %s/experiments.json %s/regression_experiments.json"
-        % (path, path)
+    result = procrunner.run(
+        [
+            "dials.compare_orientation_matrices",
+            os.path.join(path, "experiments.json"),
+            os.path.join(path, "regression_experiments.json"),
+        ]
     )
-    result = easy_run.fully_buffered(cmd).raise_if_errors()
-    out = "\n".join(result.stdout_lines[7:])
+    assert not result.returncode and not result.stderr
+    out = "\n".join(result.stdout.decode("latin-1").splitlines()[7:])
     out = out.replace("-0", "0")
     assert (
         out
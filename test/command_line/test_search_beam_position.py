@@ -1,5 +1,6 @@
 from __future__ import absolute_import, division, print_function
 
+import copy
 import glob
 import mock
 import os
@@ -14,6 +15,7 @@
 from dxtbx.model import ExperimentList
 
 import dials.command_line.dials_import
+from dials.array_family import flex
 from dials.algorithms.indexing.test_index import run_indexing
 from dials.command_line import search_beam_position
 
@@ -253,3 +255,29 @@ def test_multi_sweep_fixed_rotation(dials_regression, run_in_tmpdir):
         ) - scitbx.matrix.col(new_expt.detector[0].get_origin())
         print(shift)
         assert shift.elems == pytest.approx((2.293, -0.399, 0), abs=1e-2)
+
+
+def test_trial_rlps_match_translated_detector(dials_data):
+    """Check the rlps for a trial origin offset match those for a translated detector."""
+    from rstbx.indexing_api import dps_extended
+
+    data = dials_data("l_cysteine_dials_output")
+    experiments = load.experiment_list(
+        data.join("imported.expt").strpath, check_format=False
+    )
+    reflections = flex.reflection_table.from_file(data.join("strong.refl").strpath)
+    expt = experiments[0]
+    refl = reflections.select(reflections["id"] == 0)
+    refl["imageset_id"] = flex.int(len(refl), 0)
+    refl.centroid_px_to_mm([expt])
+
+    offset = scitbx.matrix.col((0.5, -0.3, 0.1))
+    phi = refl["xyzobs.mm.value"].parts()[2]
+    lab_coords = search_beam_position._spot_lab_coordinates(refl, expt.detector)
+    rlp = search_beam_position._trial_rlps(offset, lab_coords, phi, expt)
+
+    expt = copy.deepcopy(expt)
+    expt.detector = dps_extended.get_new_detector(expt.detector, offset)
+    expt.goniometer.set_fixed_rotation((1, 0, 0, 0, 1, 0, 0, 0, 1))
+    refl.map_centroids_to_reciprocal_space([expt])
+    assert list(rlp.as_double()) == pytest.approx(list(refl["rlp"].as_double()))
@@ -1,4 +1,7 @@
 import json
+
+import numpy as np
+
 from dials.command_line import stereographic_projection
 
 import procrunner
@@ -58,3 +61,29 @@ def test_labels(dials_data, tmpdir):
             "7",
             "7",
         ]
+
+
+def test_unique_reduced_miller_indices():
+    from cctbx.array_family import flex
+
+    miller_indices = flex.miller_index(
+        [(2, 0, 0), (1, 0, 0), (-3, 6, 0), (2, 4, 6), (1, 2, 3), (0, 0, 0)]
+    )
+    reduced = stereographic_projection.unique_reduced_miller_indices(miller_indices)
+    assert list(reduced) == [(-1, 2, 0), (1, 0, 0), (1, 2, 3)]
+
+
+def test_non_overlapping_label_indices():
+    xy = np.array(
+        [
+            (0.0004999, 0.5),  # either side of a bin edge: only the first is labelled
+            (0.0005001, 0.5),
+            (0.1, 0.1),
+            (0.1008, 0.1),  # within tolerance of the previous point
+            (0.1016, 0.1),  # within tolerance of the (unlabelled) previous point
+            (0.2, 0.2),
+            (0.2, 0.2),
+            (0.3, 0.3),
+        ]
+    )
+    assert stereographic_projection._non_overlapping_label_indices(xy) == [0, 2, 5, 7]
@@ -64,6 +64,7 @@ def __init__(
         # Set the parameters
         self._title = title
         self._indent = indent
+        self._indent_str = " " * indent
         self._spinner = spinner
         self._estimate_time = estimate_time
         self._bar = bar
@@ -71,6 +72,10 @@ def __init__(
 
         self._timer = ProgressBarTimer()
 
+        # Only redraw after a certain period or at 100%
+        self._update_period = 0.5
+        self._last_draw_time = None
+
         # Print 0 percent
         self.update(0)
 
@@ -89,43 +94,47 @@ def update(self, fpercent):
         if percent > 100:
             percent = 100
 
-        # Add a percentage counter
-        right_str = ""
-        left_str = ""
-        if sys.stdout.isatty():
-            left_str = "\r"
-        left_str += " " * self._indent
+        # Skip the redraw if the bar was drawn recently
+        curr_time = time.time()
+        if (
+            self._last_draw_time is not None
+            and curr_time - self._last_draw_time < self._update_period
+            and percent < 100
+        ):
+            return
+        self._last_draw_time = curr_time
 
-        # Add a title if given
+        # Add a percentage counter, after an optional title
+        left = ["\r", self._indent_str]
         if self._title:
-            left_str += self._title + ": "
-
-        left_str += "{: >3}%".format(percent)
+            left.append(self._title + ": ")
+        left.append("{: >3}%".format(percent))
 
         # Add a spinner
         if self._spinner:
-            left_str += " "
-            left_str += "[ {} ]".format(r"-\|/"[percent % 4])
+            left.append(" [ {} ]".format(r"-\|/"[percent % 4]))
 
         # Add a timer
+        right_str = ""
         if self._estimate_time:
             n_seconds_left = self._timer.update(fpercent)
             if n_seconds_left < 0:
                 n_seconds_left = "?"
             else:
                 n_seconds_left = int(ceil(n_seconds_left))
-            right_str = " " + "est: {}s".format(n_seconds_left) + right_str
+            right_str = " est: {}s".format(n_seconds_left)
 
         # Add a bar
         if self._bar:
-            bar_length = self._length - (len(left_str) + len(right_str)) - 5
+            left_len = sum(len(part) for part in left)
+            bar_length = self._length - (left_len + len(right_str)) - 5
             n_char = int(percent * bar_length / 100)
             n_space = bar_length - n_char
-            left_str += " "
-            left_str += "[ {0}>{1} ]".format("=" * n_char, " " * n_space)
+            left.append(" [ {0}>{1} ]".format("=" * n_char, " " * n_space))
 
         # Append strings
-        progress_str = left_str + right_str
+        left.append(right_str)
+        progress_str = "".join(left)
 
         # Print progress string to stdout
         sys.stdout.write(progress_str)
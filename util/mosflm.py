@@ -84,17 +84,21 @@ def dump(experiments, directory):
             )
 
 
+# format string for a complete mosflm matrix file: the A matrix, missets, the
+# U matrix, unit cell parameters and missets again
+_MOSFLM_MAT_FMT = "\n".join(
+    ["%12.8f" * 3] * 3
+    + ["%12.3f" * 3]
+    + ["%12.8f" * 3] * 3
+    + ["%12.4f" * 6, "%12.3f" * 3]
+)
+
+
 def format_mosflm_mat(A, U, unit_cell, missets=(0, 0, 0)):
-    lines = []
-    uc_params = unit_cell.parameters()
-    for i in range(3):
-        lines.append(("%12.8f" * 3) % A.elems[i * 3 : 3 * (i + 1)])
-    lines.append(("%12.3f" * 3) % missets)
-    for i in range(3):
-        lines.append("%12.8f" * 3 % U.elems[i * 3 : 3 * (i + 1)])
-    lines.append(("%12.4f" * 6) % uc_params)
-    lines.append(("%12.3f" * 3) % missets)
-    return "\n".join(lines)
+    missets = tuple(missets)
+    return _MOSFLM_MAT_FMT % (
+        A.elems + missets + U.elems + tuple(unit_cell.parameters()) + missets
+    )
 
 
 def write_mosflm_input(
@@ -13,13 +13,11 @@
 FilenameDataWrapper = collections.namedtuple("FilenameDataWrapper", "filename, data")
 
 
-class ExperimentListConverters(object):
-    """A phil converter for the experiment list class."""
-
-    phil_type = "experiment_list"
+class _FilenameDataConverters(object):
+    """A base phil converter for data loaded from a file, which is stored along
+    with the filename it was loaded from."""
 
-    def __init__(self, check_format=True):
-        self._check_format = check_format
+    phil_type = None
 
     def __str__(self):
         return self.phil_type
@@ -28,16 +26,12 @@ def from_words(self, words, master):
         s = libtbx.phil.str_from_words(words=words)
         if s is None:
             return None
-        if s == "<image files>":
-            return FilenameDataWrapper(filename=s, data=None)
         if not os.path.exists(s):
             raise Sorry("File %s does not exist" % s)
-        return FilenameDataWrapper(
-            filename=s,
-            data=ExperimentListFactory.from_json_file(
-                s, check_format=self._check_format
-            ),
-        )
+        return FilenameDataWrapper(filename=s, data=self._load(s))
+
+    def _load(self, filename):
+        raise NotImplementedError()
 
     def as_words(self, python_object, master):
         if python_object is None:
@@ -47,28 +41,33 @@ def as_words(self, python_object, master):
         return [libtbx.phil.tokenizer.word(value=value)]
 
 
-class ReflectionTableConverters(object):
-    """A phil converter for the reflection table class."""
+class ExperimentListConverters(_FilenameDataConverters):
+    """A phil converter for the experiment list class."""
 
-    phil_type = "reflection_table"
+    phil_type = "experiment_list"
 
-    def __str__(self):
-        return self.phil_type
+    def __init__(self, check_format=True):
+        self._check_format = check_format
 
     def from_words(self, words, master):
         s = libtbx.phil.str_from_words(words=words)
-        if s is None:
-            return None
-        if not os.path.exists(s):
-            raise Sorry("File %s does not exist" % s)
-        return FilenameDataWrapper(filename=s, data=flex.reflection_table.from_file(s))
+        if s == "<image files>":
+            return FilenameDataWrapper(filename=s, data=None)
+        return super(ExperimentListConverters, self).from_words(words, master)
 
-    def as_words(self, python_object, master):
-        if python_object is None:
-            value = "None"
-        else:
-            value = python_object.filename
-        return [libtbx.phil.tokenizer.word(value=value)]
+    def _load(self, filename):
+        return ExperimentListFactory.from_json_file(
+            filename, check_format=self._check_format
+        )
+
+
+class ReflectionTableConverters(_FilenameDataConverters):
+    """A phil converter for the reflection table class."""
+
+    phil_type = "reflection_table"
+
+    def _load(self, filename):
+        return flex.reflection_table.from_file(filename)
 
 
 class ReflectionTableSelectorConverters(object):
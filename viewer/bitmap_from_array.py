@@ -13,6 +13,7 @@ def __init__(
         self, lst_data_in, show_nums=True, palette="black2white", lst_data_mask_in=None
     ):
         self.wx_bmp_arr = rgb_img()
+        self._scaled_bmp_lst = {}
         if lst_data_in is None and lst_data_mask_in is None:
             self._ini_wx_bmp_lst = None
 
@@ -20,8 +21,6 @@ def __init__(
             self._ini_wx_bmp_lst = []
             for lst_pos in range(len(lst_data_in)):
                 data_3d_in = lst_data_in[lst_pos]
-                xmax = data_3d_in.shape[1]
-                ymax = data_3d_in.shape[2]
 
                 # remember to put here some assertion to check that
                 # both arrays have the same shape
@@ -29,22 +28,17 @@ def __init__(
                 if lst_data_mask_in is not None:
                     data_3d_in_mask = lst_data_mask_in[lst_pos]
 
-                self.vl_max = float(np.amax(data_3d_in))
-                self.vl_min = float(np.amin(data_3d_in))
-                tmp_data2d = np.zeros((xmax, ymax), "double")
-                tmp_data2d_mask = np.zeros((xmax, ymax), "double")
                 z_dp = data_3d_in.shape[0]
                 single_block_lst_01 = []
                 for z in range(z_dp):
-                    # print "z =", z
-                    tmp_data2d[:, :] = data_3d_in[z : z + 1, :, :]
+                    # pass each slice straight through as a view
                     if lst_data_mask_in is not None:
-                        tmp_data2d_mask[:, :] = data_3d_in_mask[z : z + 1, :, :]
+                        data2d_mask = data_3d_in_mask[z]
                     else:
-                        tmp_data2d_mask = None
+                        data2d_mask = None
 
                     data_sigle_img = self._wx_img_w_cpp(
-                        tmp_data2d, show_nums, palette, tmp_data2d_mask
+                        data_3d_in[z], show_nums, palette, data2d_mask
                     )
 
                     single_block_lst_01.append(data_sigle_img)
@@ -69,6 +63,10 @@ def bmp_lst_scaled(self, scale=1.0):
             del dc
             wx_bmp_lst = [[wxBitmap]]
 
+        elif scale in self._scaled_bmp_lst:
+            # e.g. zooming further when already at the zoom limit
+            wx_bmp_lst = self._scaled_bmp_lst[scale]
+
         else:
             wx_bmp_lst = []
             for data_3d in self._ini_wx_bmp_lst:
@@ -78,24 +76,19 @@ def bmp_lst_scaled(self, scale=1.0):
 
                 wx_bmp_lst.append(single_block_lst)
 
+            # only keep the bitmaps for the most recent scale
+            self._scaled_bmp_lst = {scale: wx_bmp_lst}
+
         return wx_bmp_lst
 
     def _wx_img_w_cpp(self, np_2d_tmp, show_nums, palette, np_2d_mask=None):
 
-        xmax = np_2d_tmp.shape[1]
-        ymax = np_2d_tmp.shape[0]
-
         if np_2d_mask is None:
-            np_2d_mask = np.zeros((ymax, xmax), "double")
-
-        transposed_data = np.zeros((ymax, xmax), "double")
-        transposed_mask = np.zeros((ymax, xmax), "double")
+            np_2d_mask = np.zeros(np_2d_tmp.shape, "double")
 
-        transposed_data[:, :] = np_2d_tmp
-        transposed_mask[:, :] = np_2d_mask
-
-        flex_data_in = flex.double(transposed_data)
-        flex_mask_in = flex.double(transposed_mask)
+        # flex.double copies from the arrays, which only need to be contiguous
+        flex_data_in = flex.double(np.ascontiguousarray(np_2d_tmp, "double"))
+        flex_mask_in = flex.double(np.ascontiguousarray(np_2d_mask, "double"))
 
         if palette == "black2white":
             palette_num = 1
@@ -111,16 +104,12 @@ def _wx_img_w_cpp(self, np_2d_tmp, show_nums, palette, np_2d_mask=None):
         )
 
         np_img_array = img_array_tmp.as_numpy_array()
-
-        height = np.size(np_img_array[:, 0:1, 0:1])
-        width = np.size(np_img_array[0:1, :, 0:1])
-        img_array = np.empty((height, width, 3), "uint8")
-        img_array[:, :, :] = np_img_array[:, :, :]
+        height, width = np_img_array.shape[:2]
 
         self._wx_image = (
             wx.EmptyImage(width, height) if WX3 else wx.Image(width, height)
         )
-        self._wx_image.SetData(img_array.tostring())
+        self._wx_image.SetData(np_img_array.astype("uint8").tobytes())
 
         data_to_become_bmp = (self._wx_image, width, height)
 
@@ -131,6 +120,9 @@ def _wx_bmp_scaled(self, data_to_become_bmp, scale):
         width = data_to_become_bmp[1]
         height = data_to_become_bmp[2]
 
+        if scale == 1.0:
+            return to_become_bmp.ConvertToBitmap()
+
         NewW = int(width * scale)
         NewH = int(height * scale)
         to_become_bmp = to_become_bmp.Scale(NewW, NewH, wx.IMAGE_QUALITY_NORMAL)